@@ -1,20 +1,27 @@
 import streamlit as st
-from datetime import datetime
 import sqlite3
+import sys
 import joblib
+import numpy as np
 import pandas as pd
 
 # ============================================
 # INITIALIZE SESSION STATE
 # ============================================
-if "suggestion" not in st.session_state:
-    st.session_state.suggestion = None
+if "suggestion_msg" not in st.session_state:
+    st.session_state.suggestion_msg = None
+if "suggestion_level" not in st.session_state:
+    st.session_state.suggestion_level = None
 if "checked_word" not in st.session_state:
     st.session_state.checked_word = None
 if "selected_level" not in st.session_state:
     st.session_state.selected_level = "remember"
 if "level_page" not in st.session_state:
     st.session_state.level_page = None  # Track selected Bloom level
+if "cached_username" not in st.session_state:
+    st.session_state.cached_username = None
+if "user_id" not in st.session_state:
+    st.session_state.user_id = None
 
 # ============================================ # BLOOM LEVEL LABELS # ============================================  
 LEVEL_LABELS = {  
@@ -26,101 +33,245 @@ LEVEL_LABELS = {
     "create": "Create (C6)" 
 }
 
+# Canonical (interned) level names accepted by the app
+BLOOM_LEVELS = frozenset(map(sys.intern, LEVEL_LABELS))
+
 # ============================================
 # LOAD MODELS
 # ============================================
-model = joblib.load("bloom_model.pkl")
-vectorizer = joblib.load("tfidf_vectorizer.pkl")
+@st.cache_resource
+def load_models():
+    # Loaded once per process instead of on every rerun
+    return joblib.load("bloom_model.pkl"), joblib.load("tfidf_vectorizer.pkl")
+
+model, vectorizer = load_models()
 
 # ============================================
 # LOAD BLOOM VERBS DATA
 # ============================================
-bloom_df = pd.read_csv("bloom_verbs.csv")
-bloom_df['verb'] = bloom_df['verb'].astype(str).str.strip()
-bloom_df['bloom_level'] = bloom_df['bloom_level'].astype(str).str.strip()
-bloom_df = bloom_df[bloom_df['verb'] != ""]
-bloom_df = bloom_df[bloom_df['bloom_level'] != ""]
+@st.cache_data
+def load_bloom_df():
+    df = pd.read_csv("bloom_verbs.csv")
+    df['verb'] = df['verb'].astype(str).str.strip()
+    df['bloom_level'] = df['bloom_level'].astype(str).str.strip()
+    df = df[(df['verb'] != "") & (df['bloom_level'] != "")].reset_index(drop=True)
+    # Normalise levels once; comparisons then run on the category codes
+    df['bloom_level'] = df['bloom_level'].str.lower().astype(
+        pd.CategoricalDtype(categories=list(LEVEL_LABELS))
+    )
+    return df
+
+@st.cache_resource
+def load_verbs_by_level():
+    # Group once per process; no args to hash and the same dict on every rerun.
+    # Tuples, since the dict is shared by every session
+    df = load_bloom_df()
+    return {
+        lvl: tuple(grp['verb'])
+        for lvl, grp in df.groupby('bloom_level', observed=True)
+    }
+
+VERBS_BY_LEVEL = load_verbs_by_level()
 
 def get_similar_verbs(level):
-    level = level.strip().lower()
-    verbs = bloom_df[bloom_df['bloom_level'].str.lower() == level]['verb'].tolist()
-    return verbs
+    # VERBS_BY_LEVEL only holds valid levels, so it doubles as the check
+    return VERBS_BY_LEVEL.get(sys.intern(level.strip().lower()), ())
 
 def display_verbs_table(verbs, cols=3):
-    rows = [verbs[i:i+cols] for i in range(0, len(verbs), cols)]
-    df = pd.DataFrame(rows)
-    df = df.fillna("")
-    df.columns = ["verbs"] + [" " * (i+1) for i in range(df.shape[1] - 1)]
-    st.dataframe(df, hide_index=True, use_container_width=True)
+    # Pad and reshape into a row-major grid, then render it as a single element
+    grid = np.array(list(verbs) + [""] * (-len(verbs) % cols), dtype=object).reshape(-1, cols)
+    st.dataframe(pd.DataFrame(grid), hide_index=True, use_container_width=True)
 
 # ============================================
 # DATABASE SETUP
 # ============================================
-conn = sqlite3.connect("bloom_indicator.db", check_same_thread=False)
+@st.cache_resource
+def init_db():
+    # Schema setup runs once per process instead of on every rerun
+    conn = sqlite3.connect("bloom_indicator.db")
+    cursor = conn.cursor()
+
+    # WAL is a persistent property of the database file
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS bloom_words (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        word TEXT,
+        suggested_level TEXT,
+        vote_count INTEGER DEFAULT 0,
+        approved INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS votes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        word_id INTEGER,
+        UNIQUE(user_id, word_id)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        question_text TEXT,
+        predicted_level TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Older databases can hold duplicate (word, level) rows from the racy
+    # check-then-insert; fold them into the lowest id before adding the unique index
+    cursor.execute("DROP TABLE IF EXISTS temp.bloom_word_dupes")
+
+    cursor.execute("""
+    CREATE TEMP TABLE bloom_word_dupes AS
+    SELECT b.id AS dup_id, k.keep_id
+    FROM bloom_words b
+    JOIN (
+        SELECT word, suggested_level, MIN(id) AS keep_id
+        FROM bloom_words
+        GROUP BY word, suggested_level
+        HAVING COUNT(*) > 1
+    ) k ON b.word = k.word AND b.suggested_level = k.suggested_level
+    WHERE b.id <> k.keep_id
+    """)
+
+    cursor.execute("""
+    UPDATE OR IGNORE votes
+    SET word_id = (SELECT keep_id FROM bloom_word_dupes WHERE dup_id = votes.word_id)
+    WHERE word_id IN (SELECT dup_id FROM bloom_word_dupes)
+    """)
+
+    # Votes left behind are from users who already voted on the kept row
+    cursor.execute("""
+    DELETE FROM votes
+    WHERE word_id IN (SELECT dup_id FROM bloom_word_dupes)
+    """)
+
+    cursor.execute("""
+    UPDATE bloom_words
+    SET vote_count = (SELECT COUNT(*) FROM votes WHERE word_id = bloom_words.id),
+        approved = ((SELECT COUNT(*) FROM votes WHERE word_id = bloom_words.id) >= 10)
+    WHERE id IN (SELECT keep_id FROM bloom_word_dupes)
+    """)
+
+    cursor.execute("""
+    DELETE FROM bloom_words
+    WHERE id IN (SELECT dup_id FROM bloom_word_dupes)
+    """)
+
+    cursor.execute("DROP TABLE temp.bloom_word_dupes")
+
+    # Unique so submit_word can upsert on (word, level)
+    cursor.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_bloom_words_word_level
+    ON bloom_words (word, suggested_level)
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_bloom_words_word_approved
+    ON bloom_words (word, approved)
+    """)
+
+    conn.commit()
+    conn.close()
+
+def connect_db():
+    conn = sqlite3.connect("bloom_indicator.db", check_same_thread=False, cached_statements=256)
+    cursor = conn.cursor()
+
+    # Per-connection settings; synchronous=NORMAL avoids an fsync on every commit under WAL
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    return conn
+
+init_db()
+
+# One connection per session so transactions never interleave across users
+if "conn" not in st.session_state:
+    st.session_state.conn = connect_db()
+conn = st.session_state.conn
 cursor = conn.cursor()
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE
-)
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS bloom_words (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    word TEXT,
-    suggested_level TEXT,
-    vote_count INTEGER DEFAULT 0,
-    approved INTEGER DEFAULT 0,
-    created_at TEXT
-)
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS votes (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER,
-    word_id INTEGER,
-    UNIQUE(user_id, word_id)
-)
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS questions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    question_text TEXT,
-    predicted_level TEXT,
-    created_at TEXT
-)
-""")
-
-conn.commit()
+# ============================================
+# SQL STATEMENTS
+# ============================================
+# Shared constants so every call reuses the same compiled statement
+SQL_INSERT_USER = "INSERT OR IGNORE INTO users (username) VALUES (?)"
+SQL_GET_USER_ID = "SELECT id FROM users WHERE username=?"
+
+SQL_GET_APPROVED = """
+    SELECT suggested_level FROM bloom_words 
+    WHERE word=? AND approved=1
+"""
+
+# No-op update on conflict so RETURNING yields the row whether new or existing
+SQL_UPSERT_WORD = """
+    INSERT INTO bloom_words (word, suggested_level, created_at, vote_count)
+    VALUES (?, ?, datetime('now'), 0)
+    ON CONFLICT(word, suggested_level) DO UPDATE SET word=excluded.word
+    RETURNING id, vote_count
+"""
+
+SQL_ADD_WORD_VOTE = """
+    UPDATE bloom_words
+    SET vote_count=vote_count + 1, approved=(vote_count + 1 >= 10)
+    WHERE id=?
+    RETURNING vote_count, approved
+"""
+
+SQL_INSERT_VOTE = "INSERT OR IGNORE INTO votes (user_id, word_id) VALUES (?, ?)"
+
+SQL_INSERT_QUESTION = """
+    INSERT INTO questions (question_text, predicted_level, created_at)
+    VALUES (?, ?, datetime('now'))
+"""
 
 # ============================================
 # PREDICT QUESTION LEVEL
 # ============================================
+def predict_questions(texts):
+    # One vectorizer + model call for the whole batch
+    X = vectorizer.transform(texts)
+    return model.predict(X).tolist()
+
+@st.cache_data(max_entries=10000)
+def _predict_cached(text):
+    # Repeated words/questions skip the vectorizer + model round-trip
+    return predict_questions([text])[0]
+
 def predict_question(question):
-    X = vectorizer.transform([question])
-    pred = model.predict(X)[0]
-    return pred
+    return _predict_cached(question)
+
+def log_questions(texts, preds):
+    cursor.executemany(SQL_INSERT_QUESTION, list(zip(texts, preds)))
+    conn.commit()
 
 # ============================================
 # CHECK / SUGGEST WORD
 # ============================================
 def check_or_predict_word(word):
-    cursor.execute("""
-        SELECT suggested_level FROM bloom_words 
-        WHERE word=? AND approved=1
-    """, (word,))
+    cursor.execute(SQL_GET_APPROVED, (word,))
     result = cursor.fetchone()
 
     if result:
-        return f"✅ '{word}' is already APPROVED at Bloom Level: {result[0]}"
+        return f"✅ '{word}' is already APPROVED at Bloom Level: {result[0]}", result[0]
 
-    X = vectorizer.transform([word])
-    pred = model.predict(X)[0]
-    return f"ℹ NLP Suggestion: {pred}"
+    pred = _predict_cached(word)
+    return f"ℹ NLP Suggestion: {pred}", pred
 
 # ============================================
 # SUBMIT / VOTE SYSTEM
@@ -128,54 +279,34 @@ def check_or_predict_word(word):
 def submit_word(word, level, user_id):
 
     if not user_id:
-        return "Please enter your username before voting."
+        return "Please enter your username before voting.", False
 
-    cursor.execute("""
-        SELECT id, vote_count FROM bloom_words 
-        WHERE word=? AND suggested_level=?
-    """, (word, level))
-    result = cursor.fetchone()
+    level = sys.intern(level.strip().lower())
+    if level not in BLOOM_LEVELS:
+        return f"Unknown Bloom level '{level}'.", False
 
-    if result:
-        word_id, vote_count = result
+    # One write transaction for the whole check-and-vote; IMMEDIATE takes the
+    # write lock up front so concurrent voters can't race the vote check
+    with conn:
+        cursor.execute("BEGIN IMMEDIATE")
 
-        cursor.execute("""
-            SELECT id FROM votes 
-            WHERE user_id=? AND word_id=?
-        """, (user_id, word_id))
+        cursor.execute(SQL_UPSERT_WORD, (word, level))
+        word_id, previous_votes = cursor.fetchone()
 
-        if cursor.fetchone():
-            return "You have already voted for this word."
+        cursor.execute(SQL_INSERT_VOTE, (user_id, word_id))
+        if cursor.rowcount == 0:
+            return "You have already voted for this word.", False
 
-        cursor.execute("INSERT INTO votes (user_id, word_id) VALUES (?, ?)", (user_id, word_id))
+        cursor.execute(SQL_ADD_WORD_VOTE, (word_id,))
+        vote_count, approved = cursor.fetchone()
 
-        vote_count += 1
-        approved = 1 if vote_count >= 10 else 0
+    if previous_votes == 0:
+        return f"✅ Added '{word}' and recorded your vote at level '{LEVEL_LABELS.get(level, level)}'.", True
 
-        cursor.execute("""
-            UPDATE bloom_words
-            SET vote_count=?, approved=?
-            WHERE id=?
-        """, (vote_count, approved, word_id))
+    if approved:
+        return f"🎉 '{word}' has reached 10 votes and is now APPROVED at level '{LEVEL_LABELS.get(level, level)}'.", True
 
-        conn.commit()
-
-        if approved:
-            return f"🎉 '{word}' has reached 10 votes and is now APPROVED at level '{LEVEL_LABELS.get(level, level)}'."
-
-        return f"✅ Vote recorded. '{word}' now has {vote_count} votes at level '{LEVEL_LABELS.get(level, level)}'."
-
-    cursor.execute("""
-        INSERT INTO bloom_words (word, suggested_level, created_at, vote_count)
-        VALUES (?, ?, ?, 1)
-    """, (word, level, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-
-    cursor.execute("SELECT last_insert_rowid()")
-    word_id = cursor.fetchone()[0]
-
-    cursor.execute("INSERT INTO votes (user_id, word_id) VALUES (?, ?)", (user_id, word_id))
-    conn.commit()
-    return f"✅ Added '{word}' and recorded your vote at level '{LEVEL_LABELS.get(level, level)}'."
+    return f"✅ Vote recorded. '{word}' now has {vote_count} votes at level '{LEVEL_LABELS.get(level, level)}'.", True
 
 # ============================================
 # STREAMLIT UI
@@ -186,13 +317,15 @@ st.title("🌿 Bloom’s Hybrid Indicator")
 st.sidebar.header("User Login")
 username = st.sidebar.text_input("Enter your username")
 
-if username:
-    cursor.execute("INSERT OR IGNORE INTO users (username) VALUES (?)", (username,))
+# Only hit the DB when the username changes, not on every rerun
+if username and st.session_state.cached_username != username:
+    cursor.execute(SQL_INSERT_USER, (username,))
     conn.commit()
-    cursor.execute("SELECT id FROM users WHERE username=?", (username,))
-    user_id = cursor.fetchone()[0]
-else:
-    user_id = None
+    cursor.execute(SQL_GET_USER_ID, (username,))
+    st.session_state.user_id = cursor.fetchone()[0]
+    st.session_state.cached_username = username
+
+user_id = st.session_state.user_id if username else None
 
 menu = ["Classify Question", "Check / Submit Word", "Bloom’s Taxonomy Level"]
 choice = st.sidebar.selectbox("Select Mode", menu)
@@ -202,9 +335,13 @@ choice = st.sidebar.selectbox("Select Mode", menu)
 # --------------------------------------------------
 if choice == "Classify Question":
     st.header("🔍 Classify Bloom Level for a Question")
-    question = st.text_area("Enter the full question:")
 
-    if st.button("Classify"):
+    # Form defers the rerun until the question is submitted
+    with st.form("classify_form"):
+        question = st.text_area("Enter the full question:")
+        submitted = st.form_submit_button("Classify")
+
+    if submitted:
         if question.strip():
             pred = predict_question(question)
             
@@ -221,11 +358,7 @@ if choice == "Classify Question":
                 st.subheader(f"✨ Similar verbs for **{display_label}**")
                 display_verbs_table(similar_verbs, cols=3)
 
-            cursor.execute("""
-                INSERT INTO questions (question_text, predicted_level, created_at)
-                VALUES (?, ?, ?)
-            """, (question, pred, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-            conn.commit()
+            log_questions([question], [pred])
         else:
             st.warning("Please enter a question.")
 
@@ -234,25 +367,24 @@ if choice == "Classify Question":
 # --------------------------------------------------
 elif choice == "Check / Submit Word":
     st.header("📝 Check or Submit a Word")
-    word = st.text_input("Enter a verb or keyword:")
 
-    if st.button("Check / Suggest"):
+    with st.form("check_word_form"):
+        word = st.text_input("Enter a verb or keyword:")
+        submitted = st.form_submit_button("Check / Suggest")
+
+    if submitted:
         if word.strip():
-            st.session_state.suggestion = check_or_predict_word(word)
+            msg, suggested_level = check_or_predict_word(word)
+            st.session_state.suggestion_msg = msg
+            st.session_state.suggestion_level = suggested_level
             st.session_state.checked_word = word
         else:
             st.warning("Enter a word first.")
 
-    if st.session_state.suggestion:
-        st.write(st.session_state.suggestion)
-
-        if "Bloom Level:" in st.session_state.suggestion:
-            suggested_level = st.session_state.suggestion.split("Bloom Level:")[1].strip()
-        elif "NLP Suggestion:" in st.session_state.suggestion:
-            suggested_level = st.session_state.suggestion.split("NLP Suggestion:")[1].strip()
-        else:
-            suggested_level = None
+    if st.session_state.suggestion_msg:
+        st.write(st.session_state.suggestion_msg)
 
+        suggested_level = st.session_state.suggestion_level
         if suggested_level:
             verbs = get_similar_verbs(suggested_level)
             if verbs:
@@ -264,14 +396,18 @@ elif choice == "Check / Submit Word":
 
         level = st.selectbox(
             "Suggested Bloom’s Level:",
-            ["remember", "understand", "apply", "analyze", "evaluate", "create"],
+            list(LEVEL_LABELS),
             key="selected_level"
         )
 
         if st.button("Submit Word"):
-            result = submit_word(st.session_state.checked_word, level, user_id)
-            st.success(result)
-            st.session_state.suggestion = None
+            result, accepted = submit_word(st.session_state.checked_word, level, user_id)
+            if accepted:
+                st.success(result)
+            else:
+                st.warning(result)
+            st.session_state.suggestion_msg = None
+            st.session_state.suggestion_level = None
             st.session_state.checked_word = None
 
 # --------------------------------------------------
@@ -293,30 +429,8 @@ elif choice == "Bloom’s Taxonomy Level":
 
     # Else, show main Bloom level buttons in boxes
     else:
-        col1, col2, col3 = st.columns(3)
-        col4, col5, col6 = st.columns(3)
-
-        if col1.button("Remember (C1)", key="remember"):
-            st.session_state.level_page = "remember"
-        if col2.button("Understand (C2)", key="understand"):
-            st.session_state.level_page = "understand"
-        if col3.button("Apply (C3)", key="apply"):
-            st.session_state.level_page = "apply"
-        if col4.button("Analyze (C4)", key="analyze"):
-            st.session_state.level_page = "analyze"
-        if col5.button("Evaluate (C5)", key="evaluate"):
-            st.session_state.level_page = "evaluate"
-        if col6.button("Create (C6)", key="create"):
-            st.session_state.level_page = "create"
-
-
-
-
-
-
-
-
-
-
-
+        cols = st.columns(3) + st.columns(3)
 
+        for level, col in zip(LEVEL_LABELS, cols):
+            if col.button(LEVEL_LABELS[level], key=level):
+                st.session_state.level_page = level